@@ -1,6 +1,8 @@
 import pandas as pd
 import joblib
 import os
+import click
+import uuid
 from flask import (
     Flask,
     url_for,
@@ -9,7 +11,9 @@ from flask import (
     request,
     send_file,
     flash,
-    session
+    session,
+    Response,
+    stream_with_context
 )
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_migrate import Migrate
@@ -18,8 +22,18 @@ from datetime import datetime
 from functools import wraps
 
 from config import Config
-from models import db, User, Prediction
+from models import (
+    db,
+    User,
+    Prediction,
+    PatientGroup,
+    ROLE_CLINICIAN,
+    cohort_query,
+    migrate_clinician_columns,
+    migrate_prediction_codes
+)
 from forms import InputForm, RegistrationForm, LoginForm
+from exports import EXPORT_MIMETYPES, DEFAULT_BATCH_SIZE, available_formats, stream_predictions
 from utils import (
     calculate_bmi,
     calculate_risk_score,
@@ -28,11 +42,18 @@ from utils import (
     generate_pdf_report,
     get_recommendations
 )
+from lookups import stage_for, use_recommendations_file
+from logging_setup import init_logging, audit
+from idempotency import RecentResults, submission_hash
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Load custom recommendation sets once, at startup
+if app.config['RECOMMENDATIONS_FILE']:
+    use_recommendations_file(app.config['RECOMMENDATIONS_FILE'])
+
 # Initialize extensions
 db.init_app(app)
 migrate = Migrate(app, db)
@@ -42,6 +63,9 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
+# Recent prediction results, used to answer repeated submissions
+recent_predictions = RecentResults(ttl=app.config['IDEMPOTENCY_TTL'])
+
 # Load model
 try:
     model = joblib.load("model.joblib")
@@ -49,14 +73,24 @@ except Exception as e:
     print(f"Error loading model: {e}")
     model = None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (JSON, drained by a background thread)
+init_logging(app)
 logger = logging.getLogger(__name__)
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+def clinician_required(view):
+    """Restrict a view to users with the clinician role"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_clinician:
+            flash('Clinician access required.', 'danger')
+            return redirect(url_for('dashboard'))
+        return view(*args, **kwargs)
+    return wrapped
+
 # Routes
 @app.route("/health")
 def health():
@@ -66,7 +100,7 @@ def health():
         db.session.execute(db.text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}, 200
     except Exception as e:
-        logger.error(f"Health check failed: {e}", exc_info=True)
+        logger.error("Health check failed: %s", e, exc_info=True)
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}, 500
 @app.route("/")
 @app.route("/home")
@@ -75,7 +109,7 @@ def home():
     try:
         return render_template("home.html", title="Home")
     except Exception as e:
-        logger.error(f"Error on home page: {e}")
+        logger.error("Error on home page: %s", e)
         return render_template("error.html", error="An error occurred"), 500
 
 @app.route("/register", methods=["GET", "POST"])
@@ -91,12 +125,12 @@ def register():
             user.set_password(form.password.data)
             db.session.add(user)
             db.session.commit()
-            logger.info(f"New user registered: {form.username.data}")
+            logger.info("New user registered: %s", form.username.data)
             flash('Registration successful! You can now log in.', 'success')
             return redirect(url_for('login'))
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Registration error: {e}", exc_info=True)
+            logger.error("Registration error: %s", e, exc_info=True)
             flash(f'Registration error: {str(e)}', 'danger')
     return render_template("register.html", title="Register", form=form)
 
@@ -112,13 +146,13 @@ def login():
             user = User.query.filter_by(username=form.username.data).first()
             if user and user.check_password(form.password.data):
                 login_user(user)
-                logger.info(f"User logged in: {form.username.data}")
+                logger.info("User logged in: %s", form.username.data, extra={'sample': True})
                 next_page = request.args.get('next')
                 return redirect(next_page) if next_page else redirect(url_for('dashboard'))
             else:
                 flash('Invalid username or password.', 'danger')
         except Exception as e:
-            logger.error(f"Login error: {e}")
+            logger.error("Login error: %s", e)
             flash('An error occurred during login.', 'danger')
     return render_template("login.html", title="Login", form=form)
 
@@ -139,7 +173,7 @@ def dashboard():
         predictions = Prediction.query.filter_by(user_id=current_user.id).order_by(Prediction.created_at.desc()).paginate(page=page, per_page=10)
         return render_template("dashboard.html", title="Dashboard", predictions=predictions)
     except Exception as e:
-        logger.error(f"Dashboard error: {e}", exc_info=True)
+        logger.error("Dashboard error: %s", e, exc_info=True)
         flash(f'Error loading dashboard: {str(e)}', 'danger')
         return redirect(url_for('home'))
 
@@ -156,7 +190,25 @@ def predict():
     bmi = None
     risk_level = "Unknown"
     
-    if form.validate_on_submit():
+    submitted = form.validate_on_submit()
+    duplicate = None
+    if submitted:
+        idempotency_key = request.headers.get('Idempotency-Key') or form.IdempotencyKey.data
+        input_hash = submission_hash(form)
+        duplicate = recent_predictions.claim(current_user.id, idempotency_key, input_hash)
+    
+    if duplicate is not None:
+        # Repeat of a recent submission: reuse its result without running the model or saving again
+        logger.info("Duplicate prediction submission from user %s (prediction %s)",
+                    current_user.username, duplicate['prediction_id'], extra={'sample': True})
+        stage_label = duplicate['stage_label']
+        stage_class = duplicate['stage_class']
+        confidence_score = duplicate['confidence_score']
+        risk_score = duplicate['risk_score']
+        bmi = duplicate['bmi']
+        risk_level = get_risk_level(risk_score)
+        recommendations = get_recommendations(form.Severity.data)
+    elif submitted:
         try:
             if model is None:
                 flash('Model is not loaded properly.', 'danger')
@@ -190,13 +242,7 @@ def predict():
                 confidence_score = 75.0
             
             # Map prediction to stage
-            stage_map = {
-                0: ("NORMAL", "stage-normal"),
-                1: ("HYPERTENSION (Stage-1)", "stage-1"),
-                2: ("HYPERTENSION (Stage-2)", "stage-2"),
-                3: ("HYPERTENSIVE CRISIS", "stage-crisis")
-            }
-            stage_label, stage_class = stage_map.get(prediction, ("Unknown", ""))
+            stage_label, stage_class = stage_for(prediction)
             
             # Calculate BMI if height and weight provided
             if form.Height.data and form.Weight.data:
@@ -247,15 +293,31 @@ def predict():
                 notes=form.Notes.data
             )
             db.session.add(pred_record)
+            current_user.latest_prediction = pred_record
             db.session.commit()
-            logger.info(f"Prediction saved for user {current_user.username}")
+            logger.info("Prediction saved for user %s", current_user.username, extra={'sample': True})
+            audit('prediction.create', user_id=current_user.id, prediction_id=pred_record.id,
+                  stage=stage_label, risk_score=risk_score)
+            recent_predictions.put(current_user.id, idempotency_key, input_hash, dict(
+                prediction_id=pred_record.id,
+                stage_label=stage_label,
+                stage_class=stage_class,
+                confidence_score=confidence_score,
+                risk_score=risk_score,
+                bmi=bmi
+            ))
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Prediction error: {e}")
+            logger.error("Prediction error: %s", e)
             flash(f'Error making prediction: {str(e)}', 'danger')
             return render_template("predict.html", title="Predict", form=form)
+        finally:
+            # Let waiting duplicates retry if this submission did not complete
+            recent_predictions.release(current_user.id, idempotency_key, input_hash)
 
+    # Every rendered form carries a fresh key; resubmitting the previous page reuses the old one
+    form.IdempotencyKey.data = uuid.uuid4().hex
     return render_template("predict.html", 
         title="Predict", 
         form=form, 
@@ -274,7 +336,7 @@ def view_prediction(pred_id):
     """View detailed prediction"""
     try:
         prediction = Prediction.query.get_or_404(pred_id)
-        if prediction.user_id != current_user.id:
+        if not current_user.can_view_patient(prediction.user_id):
             flash('Unauthorized access.', 'danger')
             return redirect(url_for('dashboard'))
         
@@ -285,7 +347,7 @@ def view_prediction(pred_id):
             recommendations=recommendations
         )
     except Exception as e:
-        logger.error(f"Error viewing prediction: {e}")
+        logger.error("Error viewing prediction: %s", e)
         flash('Prediction not found.', 'danger')
         return redirect(url_for('dashboard'))
 
@@ -295,12 +357,12 @@ def export_pdf(pred_id):
     """Export prediction as PDF"""
     try:
         prediction = Prediction.query.get_or_404(pred_id)
-        if prediction.user_id != current_user.id:
+        if not current_user.can_view_patient(prediction.user_id):
             flash('Unauthorized access.', 'danger')
             return redirect(url_for('dashboard'))
         
         recommendations = get_recommendations(prediction.severity)
-        pdf_buffer = generate_pdf_report(current_user, prediction, recommendations)
+        pdf_buffer = generate_pdf_report(prediction.user, prediction, recommendations)
         
         if pdf_buffer:
             return send_file(
@@ -313,7 +375,7 @@ def export_pdf(pred_id):
             flash('Error generating PDF.', 'danger')
             return redirect(url_for('view_prediction', pred_id=pred_id))
     except Exception as e:
-        logger.error(f"PDF export error: {e}")
+        logger.error("PDF export error: %s", e)
         flash('Error exporting PDF.', 'danger')
         return redirect(url_for('dashboard'))
 
@@ -327,17 +389,59 @@ def delete_prediction(pred_id):
             flash('Unauthorized access.', 'danger')
             return redirect(url_for('dashboard'))
         
+        if current_user.latest_prediction_id == prediction.id:
+            current_user.refresh_latest_prediction(exclude_id=prediction.id)
         db.session.delete(prediction)
         db.session.commit()
-        logger.info(f"Prediction deleted: {pred_id}")
+        # A repeat of the deleted submission must run again rather than return its result
+        recent_predictions.forget(current_user.id, pred_id)
+        logger.info("Prediction deleted: %s", pred_id)
+        audit('prediction.delete', user_id=current_user.id, prediction_id=pred_id)
         flash('Prediction deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting prediction: {e}")
+        logger.error("Error deleting prediction: %s", e)
         flash('Error deleting prediction.', 'danger')
     
     return redirect(url_for('dashboard'))
 
+@app.route("/clinician")
+@login_required
+@clinician_required
+def clinician_dashboard():
+    """Cohort view of the clinician's patients, ranked by latest risk"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        group_id = request.args.get('group', type=int)
+        groups = current_user.clinician_groups.order_by(PatientGroup.name).all()
+        patients = db.paginate(cohort_query(current_user, group_id), page=page, per_page=25)
+        return render_template("clinician.html",
+            title="Clinician Dashboard",
+            patients=patients,
+            groups=groups,
+            group_id=group_id
+        )
+    except Exception as e:
+        logger.error("Clinician dashboard error: %s", e, exc_info=True)
+        flash('Error loading clinician dashboard.', 'danger')
+        return redirect(url_for('dashboard'))
+
+@app.route("/export/<fmt>")
+@login_required
+def export_predictions(fmt):
+    """Stream the user's prediction history as CSV, NDJSON or Parquet"""
+    if fmt not in available_formats():
+        flash(f'Export format "{fmt}" is not available.', 'danger')
+        return redirect(url_for('dashboard'))
+    
+    filename = f"BP_History_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    logger.info("Prediction export (%s) for user %s", fmt, current_user.username)
+    return Response(
+        stream_with_context(stream_predictions(fmt, user_id=current_user.id)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template("error.html", error="Page not found"), 404
@@ -345,10 +449,86 @@ def not_found_error(error):
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    logger.error(f"Internal server error: {error}")
+    logger.error("Internal server error: %s", error)
     return render_template("error.html", error="Internal server error"), 500
 
+@app.cli.command("encode-predictions")
+def encode_predictions_command():
+    """Migrate a legacy string-column prediction table to coded columns"""
+    copied = migrate_prediction_codes()
+    if copied is None:
+        print("Prediction table already uses coded columns.")
+    else:
+        print(f"Re-encoded {copied} predictions.")
+
+@app.cli.command("export-predictions")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_MIMETYPES)), default="csv", show_default=True)
+@click.option("--user", "username", default=None, help="Only export this user's predictions.")
+@click.option("--output", "-o", type=click.File("wb"), default="-", help="Output file (default: stdout).")
+@click.option("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, show_default=True)
+def export_predictions_command(fmt, username, output, batch_size):
+    """Export prediction history for all users or a single user"""
+    if fmt not in available_formats():
+        raise click.ClickException("Parquet export requires pyarrow to be installed.")
+    user_id = None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No such user: {username}")
+        user_id = user.id
+    for chunk in stream_predictions(fmt, user_id=user_id, batch_size=batch_size):
+        output.write(chunk)
+
+def _get_group(name):
+    group = PatientGroup.query.filter_by(name=name).first()
+    if group is None:
+        raise click.ClickException(f"No such group: {name}")
+    return group
+
+def _get_user(username):
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No such user: {username}")
+    return user
+
+@app.cli.command("create-group")
+@click.argument("name")
+def create_group_command(name):
+    """Create a patient group"""
+    if PatientGroup.query.filter_by(name=name).first():
+        raise click.ClickException(f"Group already exists: {name}")
+    db.session.add(PatientGroup(name=name))
+    db.session.commit()
+    print(f"Created group {name}.")
+
+@app.cli.command("assign-clinician")
+@click.argument("username")
+@click.argument("group_name")
+def assign_clinician_command(username, group_name):
+    """Give a user the clinician role and assign them to a group"""
+    user = _get_user(username)
+    group = _get_group(group_name)
+    user.role = ROLE_CLINICIAN
+    if not group.clinicians.filter(User.id == user.id).first():
+        group.clinicians.append(user)
+    db.session.commit()
+    print(f"{username} is now a clinician for {group_name}.")
+
+@app.cli.command("add-patient")
+@click.argument("username")
+@click.argument("group_name")
+def add_patient_command(username, group_name):
+    """Add a user to a patient group"""
+    user = _get_user(username)
+    group = _get_group(group_name)
+    if not group.patients.filter(User.id == user.id).first():
+        group.patients.append(user)
+    db.session.commit()
+    print(f"Added {username} to {group_name}.")
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
+        migrate_prediction_codes()
+        migrate_clinician_columns()
     app.run(debug=False, host="0.0.0.0", port=int(os.environ.get("PORT", 10000)))
@@ -22,4 +22,18 @@ class Config:
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = 86400 * 7  # 7 days
-
+    
+    # Optional JSON file with locale- or clinician-specific recommendations
+    RECOMMENDATIONS_FILE = os.environ.get('RECOMMENDATIONS_FILE')
+    
+    # Logging
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Fraction of high-volume INFO events (logins, predictions) that are logged
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+    # Append-only audit trail of prediction creates/deletes; disabled when unset
+    AUDIT_LOG_FILE = os.environ.get('AUDIT_LOG_FILE')
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '50'))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '5'))
+    
+    # Seconds a prediction result is reused for repeated submissions
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', '60'))
@@ -0,0 +1,157 @@
+"""
+Training data loader for the patient CSVs.
+
+The raw files carry empty trailing columns, whitespace-padded values and a few
+typos ('Sever', '121- 130', 'HYPERTENSIVE CRISI'). load_training_data() cleans
+them once, normalizes every column to the InputForm vocabularies in
+CATEGORY_CODES, and caches the result as int8 category codes in an .npz file
+under data/cache/. The cache is reused while the source file's mtime and size
+are unchanged, or its SHA-256 still matches after a touch. Loaded frames are
+also kept in memory per process, keyed by the same mtime and size.
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from lookups import CATEGORY_CODES, STAGE_LABELS
+
+DATA_DIR = 'data'
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+DEFAULT_SOURCE = os.path.join(DATA_DIR, 'patient_data.csv')
+SOURCE_FILES = (
+    os.path.join(DATA_DIR, 'patient_data.csv'),
+    os.path.join(DATA_DIR, 'patient_data1.csv'),
+)
+
+TARGET = 'Stages'
+FEATURES = list(CATEGORY_CODES)
+NUM_FEATURES = ['Systolic', 'Diastolic']
+CAT_FEATURES = [name for name in FEATURES if name not in NUM_FEATURES]
+
+# Stage classes in model order (the trailing 'Unknown' fallback is not a class)
+STAGES = STAGE_LABELS[:4]
+
+VOCABULARIES = dict(CATEGORY_CODES, **{TARGET: STAGES})
+# JSON round-tripped form, as stored in the cache metadata
+VOCABULARIES_JSON = json.loads(json.dumps(VOCABULARIES))
+
+# Spelling fixes applied after whitespace is stripped
+CORRECTIONS = {
+    'Severity': {'Sever': 'Severe'},
+    'Systolic': {'121- 130': '121 - 130'},
+    TARGET: {
+        'HYPERTENSION (Stage-2).': 'HYPERTENSION (Stage-2)',
+        'HYPERTENSIVE CRISI': 'HYPERTENSIVE CRISIS',
+    },
+}
+
+CACHE_VERSION = 2
+
+
+def clean_patient_data(raw):
+    """Normalize a raw patient DataFrame to categorical columns over VOCABULARIES"""
+    df = raw.rename(columns={'C': 'Gender'})
+    df = df[[*FEATURES, TARGET]]
+    cleaned = {}
+    for name, vocabulary in VOCABULARIES.items():
+        values = df[name].str.strip().replace(CORRECTIONS.get(name, {}))
+        column = pd.Categorical(values, categories=vocabulary)
+        unknown = values[(column.codes == -1) & values.notna()].unique()
+        if len(unknown):
+            raise ValueError(f'Unexpected {name} values: {list(unknown)}')
+        # Missing features are imputed by the model pipeline; a missing label is not
+        if name == TARGET and values.isna().any():
+            rows = list(values.index[values.isna()])
+            raise ValueError(f'Missing {TARGET} values in rows: {rows[:10]}')
+        cleaned[name] = column
+    return pd.DataFrame(cleaned)
+
+
+def _cache_path(source):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(CACHE_DIR, f'{stem}.npz')
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fingerprint(source):
+    stat = os.stat(source)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _write_cache(cache_path, df, meta):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    arrays = {name: df[name].cat.codes.to_numpy(dtype=np.int8) for name in VOCABULARIES}
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, __meta__=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_cache(cache_path, source):
+    """Return the cached DataFrame if it is still valid for source, else None"""
+    try:
+        with np.load(cache_path) as cache:
+            meta = json.loads(str(cache['__meta__']))
+            if meta.get('version') != CACHE_VERSION or meta.get('vocabularies') != VOCABULARIES_JSON:
+                return None
+            fingerprint = _fingerprint(source)
+            if {k: meta.get(k) for k in fingerprint} != fingerprint:
+                # Touched or rewritten: only trust the cache if the content is identical
+                if meta.get('sha256') != file_digest(source):
+                    return None
+                meta.update(fingerprint)
+                refresh = True
+            else:
+                refresh = False
+            df = pd.DataFrame({
+                name: pd.Categorical.from_codes(cache[name], categories=vocabulary)
+                for name, vocabulary in VOCABULARIES.items()
+            })
+    except (OSError, KeyError, ValueError):
+        return None
+    if refresh:
+        _write_cache(cache_path, df, meta)
+    return df
+
+
+# The fingerprint arguments only key the memo, so a changed file is reloaded
+@lru_cache(maxsize=8)
+def _load(source, mtime_ns, size):
+    cache_path = _cache_path(source)
+    df = _read_cache(cache_path, source)
+    if df is None:
+        df = clean_patient_data(pd.read_csv(source, dtype=str))
+        meta = dict(
+            _fingerprint(source),
+            version=CACHE_VERSION,
+            sha256=file_digest(source),
+            vocabularies=VOCABULARIES_JSON,
+        )
+        _write_cache(cache_path, df, meta)
+    return df
+
+
+def load_training_data(source=DEFAULT_SOURCE):
+    """Return the cleaned patient data for source as a categorical DataFrame"""
+    source = os.path.normpath(source)
+    fingerprint = _fingerprint(source)
+    return _load(source, fingerprint['mtime_ns'], fingerprint['size']).copy()
+
+
+def load_features_and_target(source=DEFAULT_SOURCE):
+    """Return (X, y) with y as stage class indices matching the model's output"""
+    df = load_training_data(source)
+    y = pd.Series(df[TARGET].cat.codes.astype(int), name=TARGET)
+    return df[FEATURES], y
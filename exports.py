@@ -0,0 +1,130 @@
+"""
+Bulk export of prediction history as CSV, NDJSON or Parquet.
+
+Rows are read from the database in yield_per batches and each batch is
+serialized and handed out before the next one is fetched, so exports of any
+size run in constant memory.
+"""
+import csv
+import io
+import json
+
+from models import db, Prediction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = [
+    'id', 'user_id', 'created_at',
+    'gender', 'age', 'history', 'patient', 'take_medication', 'severity',
+    'breath_shortness', 'visual_changes', 'nose_bleeding', 'whendiagnoused',
+    'systolic', 'diastolic', 'controlled_diet',
+    'height', 'weight', 'heart_rate',
+    'stage_label', 'stage_class', 'confidence_score', 'risk_score', 'notes'
+]
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def available_formats():
+    """Export formats usable in this environment"""
+    return [fmt for fmt in EXPORT_MIMETYPES if fmt != 'parquet' or pa is not None]
+
+
+def iter_prediction_batches(user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of prediction rows (as dicts), optionally for one user"""
+    stmt = db.select(*(getattr(Prediction, name) for name in EXPORT_COLUMNS)).order_by(Prediction.id)
+    if user_id is not None:
+        stmt = stmt.where(Prediction.user_id == user_id)
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield [row._asdict() for row in rows]
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows([row[name] for name in EXPORT_COLUMNS] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        yield ''.join(json.dumps(row, default=str) + '\n' for row in rows).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects bytes until they are drained"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema():
+    fields = []
+    for name in EXPORT_COLUMNS:
+        column_type = Prediction.__table__.c[name].type
+        if name == 'created_at':
+            fields.append(pa.field(name, pa.timestamp('us')))
+        elif isinstance(column_type, db.Integer):
+            fields.append(pa.field(name, pa.int64()))
+        elif isinstance(column_type, db.Float):
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            # Text and coded categorical columns; Parquet dictionary-encodes these
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_chunks(batches):
+    if pa is None:
+        raise RuntimeError('Parquet export requires pyarrow to be installed')
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_predictions(fmt, user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the serialized export as byte chunks"""
+    chunkers = {'csv': _csv_chunks, 'ndjson': _ndjson_chunks, 'parquet': _parquet_chunks}
+    if fmt not in chunkers:
+        raise ValueError(f'Unknown export format: {fmt}')
+    return chunkers[fmt](iter_prediction_batches(user_id, batch_size))
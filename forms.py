@@ -1,4 +1,3 @@
-import pandas as pd
 from flask_wtf import FlaskForm
 from wtforms import (
     SelectField,
@@ -7,13 +6,12 @@ from wtforms import (
     PasswordField,
     FloatField,
     IntegerField,
-    TextAreaField
+    TextAreaField,
+    HiddenField
 )
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional, NumberRange
 from models import User
-
-train = pd.read_csv('data/patient_data.csv')
-X_data = train.drop(columns=['Stages'])
+from lookups import CATEGORY_CODES
 
 class RegistrationForm(FlaskForm):
     """User registration form"""
@@ -47,79 +45,79 @@ class InputForm(FlaskForm):
     """Main prediction form"""
     Gender = SelectField(
         label="Gender",
-        choices = ['Male',"Female"],
+        choices = list(CATEGORY_CODES['Gender']),
         validators=[DataRequired()]
     )
      
     Age = SelectField(
         label="Age",
-        choices = ['18-34', '35-50', '51-64', '65+'],
+        choices = list(CATEGORY_CODES['Age']),
         validators=[DataRequired()]
     )
 
     History = SelectField(
         label="History of Hypertension",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['History']),
         validators=[DataRequired()]
     )
 
     Patient = SelectField(
         label="Diagnosed Patient",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['Patient']),
         validators=[DataRequired()]
     )
 
     TakeMedication = SelectField(
         label=" Medication for Hypertension",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['TakeMedication']),
         validators=[DataRequired()]
     )
 
     Severity = SelectField(
         label="Severity of the condition",
-        choices = ['Mild', 'Moderate', 'Severe'],
+        choices = list(CATEGORY_CODES['Severity']),
         validators=[DataRequired()]
     )
 
     BreathShortness = SelectField(
         label="Experience shortness of breath",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['BreathShortness']),
         validators=[DataRequired()]
     )
 
     VisualChanges = SelectField(
         label="Vision problems",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['VisualChanges']),
         validators=[DataRequired()]
     )
 
     NoseBleeding = SelectField(
         label="Nose Bleeds",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['NoseBleeding']),
         validators=[DataRequired()]
     )
 
     Whendiagnoused = SelectField(
         label="How long ago the condition was diagnosed",
-        choices = ['<1 Year', '1 - 5 Years', '>5 Years'],
+        choices = list(CATEGORY_CODES['Whendiagnoused']),
         validators=[DataRequired()]
     )
 
     Systolic = SelectField(
         label="Systolic blood pressure range",
-        choices = ['100+', '111 - 120', '121 - 130', '130+'],
+        choices = list(CATEGORY_CODES['Systolic']),
         validators=[DataRequired()]
     )
 
     Diastolic = SelectField(
         label="Diastolic blood pressure range",
-        choices = ['70 - 80', '81 - 90', '91 - 100', '100+', '130+'],
+        choices = list(CATEGORY_CODES['Diastolic']),
         validators=[DataRequired()]
     )
 
     ControlledDiet	 = SelectField(
         label="Conrtolled Diet",
-        choices = ['Yes',"No"],
+        choices = list(CATEGORY_CODES['ControlledDiet']),
         validators=[DataRequired()]
     )
 
@@ -144,4 +142,7 @@ class InputForm(FlaskForm):
         validators=[Optional(), Length(max=500)]
     )
 
+    # Identifies one submission of the form so repeats can be detected
+    IdempotencyKey = HiddenField()
+
     submit = SubmitField("Predict")
\ No newline at end of file
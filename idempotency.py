@@ -0,0 +1,109 @@
+"""
+Duplicate-submission suppression for predictions.
+
+RecentResults remembers the outcome of each prediction for a short time, keyed
+both by the submission's idempotency key and by a hash of its inputs. A repeat
+of the same submission inside the window (double-click, browser resubmit, API
+retry) gets the stored result back, with no model call and no new row. A
+submission is reserved before the model runs, so a repeat that arrives while
+the first is still in flight waits for its result instead of running again.
+
+The cache lives in process memory, so it covers repeats that reach the same
+worker process.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Placeholder result for a submission whose model call is still running
+_PENDING = object()
+
+# Form fields that identify the submission rather than describe the patient
+_NON_INPUT_FIELDS = {'csrf_token', 'submit', 'IdempotencyKey'}
+
+
+def submission_hash(form):
+    """Stable hash of a form's submitted inputs"""
+    inputs = {name: value for name, value in form.data.items() if name not in _NON_INPUT_FIELDS}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class RecentResults:
+    """Thread-safe TTL cache of recent prediction results per user"""
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Condition()
+
+    def _expire(self, now):
+        while self._entries:
+            key, (expires, _, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def _lookup(self, user_id, idempotency_key, input_hash):
+        if idempotency_key:
+            entry = self._entries.get((user_id, 'key', idempotency_key))
+            # A reused key with different inputs is a new submission
+            if entry and entry[1] == input_hash:
+                return entry
+        return self._entries.get((user_id, 'input', input_hash))
+
+    def _store(self, user_id, idempotency_key, input_hash, result, now):
+        entry = (now + self.ttl, input_hash, result)
+        keys = [(user_id, 'input', input_hash)]
+        if idempotency_key:
+            keys.append((user_id, 'key', idempotency_key))
+        for key in keys:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+        self._expire(now)
+
+    def claim(self, user_id, idempotency_key, input_hash):
+        """
+        Stored result for a repeated submission, waiting while an identical one
+        is in flight. Returns None when the caller should run the submission
+        itself; it is then reserved until put() or release().
+        """
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                entry = self._lookup(user_id, idempotency_key, input_hash)
+                if entry is None:
+                    self._store(user_id, idempotency_key, input_hash, _PENDING, now)
+                    return None
+                if entry[2] is not _PENDING:
+                    return entry[2]
+                # A reservation outlives its wait by at most ttl, then expires
+                self._lock.wait(entry[0] - now)
+
+    def put(self, user_id, idempotency_key, input_hash, result):
+        """Remember the result of a completed submission"""
+        with self._lock:
+            self._store(user_id, idempotency_key, input_hash, result, time.monotonic())
+            self._lock.notify_all()
+
+    def release(self, user_id, idempotency_key, input_hash):
+        """Drop a reservation that did not produce a result; no-op after put()"""
+        with self._lock:
+            for key in ((user_id, 'key', idempotency_key), (user_id, 'input', input_hash)):
+                entry = self._entries.get(key)
+                if entry and entry[1] == input_hash and entry[2] is _PENDING:
+                    del self._entries[key]
+            self._lock.notify_all()
+
+    def forget(self, user_id, prediction_id):
+        """Drop a user's stored results that point at a deleted prediction"""
+        with self._lock:
+            stale = [
+                key for key, (_, _, result) in self._entries.items()
+                if key[0] == user_id and result is not _PENDING and result['prediction_id'] == prediction_id
+            ]
+            for key in stale:
+                del self._entries[key]
@@ -0,0 +1,194 @@
+"""
+Structured, non-blocking logging for the web app.
+
+init_logging() routes every record through a QueueHandler so request threads
+only enqueue; a QueueListener thread formats records as JSON (tracebacks
+included) and writes them out. Each request gets a correlation id, taken from
+an incoming X-Request-ID header or generated, which is stamped on its records
+and echoed in the response. INFO records logged with extra={'sample': True}
+are kept at LOG_SAMPLE_RATE. Audit events (prediction creates and deletes) go
+to the 'audit' logger and, when AUDIT_LOG_FILE is set, are appended to that
+file as JSON lines in batches. The audit logger always records at INFO,
+whatever LOG_LEVEL is set to.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+audit_logger = logging.getLogger('audit')
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request's correlation id"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO-and-below records marked as sampled"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, 'sample', False) or record.levelno > logging.INFO:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        if getattr(record, 'audit', None):
+            entry.update(record.audit)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves exc_info on the record, so tracebacks are
+    formatted by the listener thread instead of the request thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchedFileHandler(logging.Handler):
+    """
+    Append formatted records to a file in batches. A batch is written when it
+    reaches `capacity` records, by a background thread every `interval`
+    seconds, and on close.
+    """
+
+    def __init__(self, filename, capacity=50, interval=5.0):
+        super().__init__()
+        self.filename = filename
+        self.capacity = capacity
+        self.interval = interval
+        self.buffer = []
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='audit-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.interval):
+            self.flush()
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer:
+                with open(self.filename, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(self.buffer) + '\n')
+                self.buffer = []
+        finally:
+            self.release()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        super().close()
+
+
+def audit(event, **fields):
+    """Record an audit event, e.g. audit('prediction.create', prediction_id=1)"""
+    audit_logger.info(event, extra={'audit': dict(fields, event=event)})
+
+
+def _assign_request_id():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+
+def _echo_request_id(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def init_logging(app):
+    """Install queued JSON logging and request correlation ids for app"""
+    global _listener
+    if _listener is None:
+        formatter = JsonFormatter()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        handlers = [stream_handler]
+
+        if app.config['AUDIT_LOG_FILE']:
+            audit_handler = BatchedFileHandler(
+                app.config['AUDIT_LOG_FILE'],
+                capacity=app.config['AUDIT_BATCH_SIZE'],
+                interval=app.config['AUDIT_FLUSH_INTERVAL']
+            )
+            audit_handler.setFormatter(formatter)
+            audit_handler.addFilter(logging.Filter(audit_logger.name))
+            handlers.append(audit_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        # QueueHandler filters run in the calling (request) thread, so they must
+        # live here rather than on the listener's handlers to see g.request_id
+        queue_handler.addFilter(RequestIdFilter())
+        queue_handler.addFilter(SamplingFilter(app.config['LOG_SAMPLE_RATE']))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(app.config['LOG_LEVEL'])
+        # LOG_LEVEL tunes diagnostics only; audit events must never be dropped
+        audit_logger.setLevel(logging.INFO)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
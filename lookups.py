@@ -0,0 +1,126 @@
+"""
+Read-only lookup tables shared by the forms, models, risk scoring and views.
+
+Everything here is built once at import as tuples and read-only mappings.
+Recommendation sets can be swapped for a locale- or clinician-specific file at
+startup with use_recommendations_file(); requests only ever read them.
+"""
+import json
+from bisect import bisect_right
+from types import MappingProxyType
+
+# Category vocabularies for the prediction inputs, in InputForm choice order.
+# Prediction rows store each value as its index into these tuples, so entries
+# may be appended but must never be reordered or removed.
+CATEGORY_CODES = MappingProxyType({
+    'Gender': ('Male', 'Female'),
+    'Age': ('18-34', '35-50', '51-64', '65+'),
+    'History': ('Yes', 'No'),
+    'Patient': ('Yes', 'No'),
+    'TakeMedication': ('Yes', 'No'),
+    'Severity': ('Mild', 'Moderate', 'Severe'),
+    'BreathShortness': ('Yes', 'No'),
+    'VisualChanges': ('Yes', 'No'),
+    'NoseBleeding': ('Yes', 'No'),
+    'Whendiagnoused': ('<1 Year', '1 - 5 Years', '>5 Years'),
+    'Systolic': ('100+', '111 - 120', '121 - 130', '130+'),
+    'Diastolic': ('70 - 80', '81 - 90', '91 - 100', '100+', '130+'),
+    'ControlledDiet': ('Yes', 'No'),
+})
+
+# Stage codes follow the model's class indices; the last entry is the fallback
+# used when the model returns an unexpected class.
+STAGE_LABELS = ('NORMAL', 'HYPERTENSION (Stage-1)', 'HYPERTENSION (Stage-2)', 'HYPERTENSIVE CRISIS', 'Unknown')
+STAGE_CLASSES = ('stage-normal', 'stage-1', 'stage-2', 'stage-crisis', '')
+
+UNKNOWN_STAGE = (STAGE_LABELS[-1], STAGE_CLASSES[-1])
+STAGE_BY_CLASS = MappingProxyType({
+    index: (label, css_class)
+    for index, (label, css_class) in enumerate(zip(STAGE_LABELS[:-1], STAGE_CLASSES[:-1]))
+})
+
+# Risk score points per input value
+RISK_POINTS = MappingProxyType({
+    'Severity': MappingProxyType({'Mild': 5, 'Moderate': 15, 'Severe': 20}),
+    'Age': MappingProxyType({'18-34': 2, '35-50': 8, '51-64': 12, '65+': 15}),
+    'Systolic': MappingProxyType({'100+': 2, '111 - 120': 5, '121 - 130': 12, '130+': 20}),
+    'Diastolic': MappingProxyType({'70 - 80': 2, '81 - 90': 5, '91 - 100': 12, '100+': 15, '130+': 20}),
+})
+
+# A score below RISK_THRESHOLDS[i] falls in RISK_LEVELS[i]; anything higher is the last level
+RISK_THRESHOLDS = (20, 40, 60)
+RISK_LEVELS = ('Low', 'Moderate', 'High', 'Very High')
+
+DEFAULT_RECOMMENDATIONS = MappingProxyType({
+    'Mild': (
+        "Monitor your blood pressure regularly at home",
+        "Maintain a healthy diet with reduced sodium intake",
+        "Exercise regularly for at least 30 minutes daily",
+        "Manage stress through meditation or yoga",
+        "Limit alcohol consumption",
+        "Maintain a healthy weight"
+    ),
+    'Moderate': (
+        "Check blood pressure daily and keep a log",
+        "Strictly follow a low-sodium diet (<2300mg per day)",
+        "Exercise 30-60 minutes daily (cardio and strength training)",
+        "Consult with a healthcare provider about medications",
+        "Reduce caffeine and alcohol intake significantly",
+        "Practice stress management techniques",
+        "Consider a weight management program"
+    ),
+    'Severe': (
+        "Seek immediate medical attention if experiencing chest pain or shortness of breath",
+        "Take prescribed medications as directed by your doctor",
+        "Monitor blood pressure multiple times daily",
+        "Follow a strict low-sodium diet strictly",
+        "Avoid physical exertion until cleared by doctor",
+        "Regular follow-up appointments with healthcare provider",
+        "Keep emergency contacts handy",
+        "Consider wearing a medical alert device"
+    ),
+})
+
+_recommendations = DEFAULT_RECOMMENDATIONS
+
+
+def stage_for(prediction):
+    """(label, css class) for a model class index"""
+    return STAGE_BY_CLASS.get(prediction, UNKNOWN_STAGE)
+
+
+def risk_level(risk_score):
+    """Risk level name for a 0-100 risk score"""
+    return RISK_LEVELS[bisect_right(RISK_THRESHOLDS, risk_score)]
+
+
+def recommendations_for(severity):
+    """Recommendation tuple for a severity level (empty if unknown)"""
+    return _recommendations.get(severity, ())
+
+
+def load_recommendations(path):
+    """
+    Read a recommendation set from a JSON file of the form
+    {"Mild": ["...", ...], "Moderate": [...], "Severe": [...]}.
+    Severities missing from the file keep the default recommendations.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: expected an object mapping severity to a list of recommendations')
+    unknown = set(data) - set(CATEGORY_CODES['Severity'])
+    if unknown:
+        raise ValueError(f'{path}: unknown severity levels {sorted(unknown)}')
+    loaded = dict(DEFAULT_RECOMMENDATIONS)
+    for severity, items in data.items():
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError(f'{path}: recommendations for {severity} must be a list of strings')
+        loaded[severity] = tuple(items)
+    return MappingProxyType(loaded)
+
+
+def use_recommendations_file(path):
+    """Replace the active recommendation set; call once at startup"""
+    global _recommendations
+    _recommendations = load_recommendations(path)
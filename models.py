@@ -3,8 +3,50 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+from lookups import CATEGORY_CODES, STAGE_LABELS, STAGE_CLASSES
+
 db = SQLAlchemy()
 
+class CodedString(db.TypeDecorator):
+    """String from a fixed vocabulary, stored as its small-integer code"""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def __init__(self, vocabulary):
+        super().__init__()
+        self.vocabulary = tuple(vocabulary)
+        self._codes = {value: code for code, value in enumerate(self.vocabulary)}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self._codes[value.strip()]
+        except KeyError:
+            raise ValueError(f'{value!r} is not one of {self.vocabulary}')
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.vocabulary[value]
+
+
+ROLE_PATIENT = 'patient'
+ROLE_CLINICIAN = 'clinician'
+
+# Clinicians see the patients of every group they are assigned to
+group_patients = db.Table(
+    'group_patients',
+    db.Column('group_id', db.Integer, db.ForeignKey('patient_group.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True, index=True)
+)
+group_clinicians = db.Table(
+    'group_clinicians',
+    db.Column('group_id', db.Integer, db.ForeignKey('patient_group.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True, index=True)
+)
+
+
 class User(UserMixin, db.Model):
     """User model for authentication"""
     id = db.Column(db.Integer, primary_key=True)
@@ -12,9 +54,20 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    role = db.Column(db.String(20), nullable=False, default=ROLE_PATIENT, server_default=ROLE_PATIENT)
+    
+    # Most recent prediction, kept current on insert and delete so cohort
+    # views can rank patients without a per-patient lookup
+    latest_prediction_id = db.Column(
+        db.Integer,
+        db.ForeignKey('prediction.id', use_alter=True, name='fk_user_latest_prediction', ondelete='SET NULL'),
+        nullable=True
+    )
     
     # Relationship
-    predictions = db.relationship('Prediction', backref='user', lazy=True, cascade='all, delete-orphan')
+    predictions = db.relationship('Prediction', backref='user', lazy=True, cascade='all, delete-orphan',
+                                  foreign_keys='Prediction.user_id')
+    latest_prediction = db.relationship('Prediction', foreign_keys=[latest_prediction_id], post_update=True)
     
     def set_password(self, password):
         """Hash and set password"""
@@ -24,29 +77,73 @@ class User(UserMixin, db.Model):
         """Check if password matches hash"""
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def is_clinician(self):
+        return self.role == ROLE_CLINICIAN
+    
+    def refresh_latest_prediction(self, exclude_id=None):
+        """Point latest_prediction at the newest prediction, optionally skipping one being deleted"""
+        query = Prediction.query.filter(Prediction.user_id == self.id)
+        if exclude_id is not None:
+            query = query.filter(Prediction.id != exclude_id)
+        self.latest_prediction = query.order_by(Prediction.created_at.desc(), Prediction.id.desc()).first()
+    
+    def can_view_patient(self, user_id):
+        """Own records, or a patient in one of this clinician's groups"""
+        if user_id == self.id:
+            return True
+        if not self.is_clinician:
+            return False
+        shared_group = (
+            db.select(group_patients.c.user_id)
+            .join(group_clinicians, group_clinicians.c.group_id == group_patients.c.group_id)
+            .where(group_clinicians.c.user_id == self.id, group_patients.c.user_id == user_id)
+            .limit(1)
+        )
+        return db.session.execute(shared_group).first() is not None
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
 
+class PatientGroup(db.Model):
+    """Group of patients that clinicians can be assigned to"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    patients = db.relationship('User', secondary=group_patients, lazy='dynamic',
+                               backref=db.backref('patient_groups', lazy='dynamic'))
+    clinicians = db.relationship('User', secondary=group_clinicians, lazy='dynamic',
+                                 backref=db.backref('clinician_groups', lazy='dynamic'))
+    
+    def __repr__(self):
+        return f'<PatientGroup {self.name}>'
+
+
 class Prediction(db.Model):
     """Prediction history model"""
+    __table_args__ = (
+        db.Index('ix_prediction_user_created', 'user_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
-    # Input data
-    gender = db.Column(db.String(20), nullable=False)
-    age = db.Column(db.String(20), nullable=False)
-    history = db.Column(db.String(10), nullable=False)
-    patient = db.Column(db.String(10), nullable=False)
-    take_medication = db.Column(db.String(10), nullable=False)
-    severity = db.Column(db.String(20), nullable=False)
-    breath_shortness = db.Column(db.String(10), nullable=False)
-    visual_changes = db.Column(db.String(10), nullable=False)
-    nose_bleeding = db.Column(db.String(10), nullable=False)
-    whendiagnoused = db.Column(db.String(20), nullable=False)
-    systolic = db.Column(db.String(20), nullable=False)
-    diastolic = db.Column(db.String(20), nullable=False)
-    controlled_diet = db.Column(db.String(10), nullable=False)
+    # Input data (stored as codes, see CATEGORY_CODES)
+    gender = db.Column(CodedString(CATEGORY_CODES['Gender']), nullable=False)
+    age = db.Column(CodedString(CATEGORY_CODES['Age']), nullable=False)
+    history = db.Column(CodedString(CATEGORY_CODES['History']), nullable=False)
+    patient = db.Column(CodedString(CATEGORY_CODES['Patient']), nullable=False)
+    take_medication = db.Column(CodedString(CATEGORY_CODES['TakeMedication']), nullable=False)
+    severity = db.Column(CodedString(CATEGORY_CODES['Severity']), nullable=False)
+    breath_shortness = db.Column(CodedString(CATEGORY_CODES['BreathShortness']), nullable=False)
+    visual_changes = db.Column(CodedString(CATEGORY_CODES['VisualChanges']), nullable=False)
+    nose_bleeding = db.Column(CodedString(CATEGORY_CODES['NoseBleeding']), nullable=False)
+    whendiagnoused = db.Column(CodedString(CATEGORY_CODES['Whendiagnoused']), nullable=False)
+    systolic = db.Column(CodedString(CATEGORY_CODES['Systolic']), nullable=False)
+    diastolic = db.Column(CodedString(CATEGORY_CODES['Diastolic']), nullable=False)
+    controlled_diet = db.Column(CodedString(CATEGORY_CODES['ControlledDiet']), nullable=False)
     
     # Additional health metrics
     height = db.Column(db.Float, nullable=True)  # in cm
@@ -54,8 +151,8 @@ class Prediction(db.Model):
     heart_rate = db.Column(db.Integer, nullable=True)
     
     # Prediction results
-    stage_label = db.Column(db.String(50), nullable=False)
-    stage_class = db.Column(db.String(20), nullable=False)
+    stage_label = db.Column(CodedString(STAGE_LABELS), nullable=False)
+    stage_class = db.Column(CodedString(STAGE_CLASSES), nullable=False)
     confidence_score = db.Column(db.Float, nullable=False)
     risk_score = db.Column(db.Float, nullable=False)
     
@@ -65,3 +162,97 @@ class Prediction(db.Model):
     
     def __repr__(self):
         return f'<Prediction {self.stage_label} on {self.created_at}>'
+
+
+def cohort_query(clinician, group_id=None):
+    """
+    Patients in the clinician's groups (optionally one group) joined to their
+    latest prediction, highest risk first. Patients without predictions come last.
+    """
+    group_ids = db.select(group_clinicians.c.group_id).where(group_clinicians.c.user_id == clinician.id)
+    if group_id is not None:
+        group_ids = group_ids.where(group_clinicians.c.group_id == group_id)
+    patient_ids = db.select(group_patients.c.user_id).where(group_patients.c.group_id.in_(group_ids))
+    # Stage codes rise with severity; the trailing Unknown fallback ranks with no prediction
+    stage_severity = db.func.nullif(
+        db.type_coerce(Prediction.stage_class, db.SmallInteger), len(STAGE_CLASSES) - 1
+    )
+    return (
+        db.select(User)
+        .outerjoin(User.latest_prediction)
+        .options(db.contains_eager(User.latest_prediction))
+        .where(User.id.in_(patient_ids))
+        .order_by(
+            Prediction.risk_score.desc().nulls_last(),
+            stage_severity.desc().nulls_last(),
+            User.username
+        )
+    )
+
+
+def migrate_clinician_columns():
+    """
+    Add the role and latest-prediction columns to a user table created before
+    clinician support, backfill the pointer, and create missing indexes.
+    Returns True if the user table was changed.
+    """
+    user_columns = {col['name'] for col in db.inspect(db.engine).get_columns('user')}
+    changed = False
+    with db.engine.begin() as conn:
+        user_table = conn.dialect.identifier_preparer.quote('user')
+        if 'role' not in user_columns:
+            conn.execute(db.text(
+                f"ALTER TABLE {user_table} ADD COLUMN role VARCHAR(20) NOT NULL DEFAULT '{ROLE_PATIENT}'"
+            ))
+            changed = True
+        if 'latest_prediction_id' not in user_columns:
+            conn.execute(db.text(
+                f'ALTER TABLE {user_table} ADD COLUMN latest_prediction_id INTEGER '
+                f'REFERENCES prediction (id) ON DELETE SET NULL'
+            ))
+            conn.execute(db.text(
+                f'UPDATE {user_table} SET latest_prediction_id = ('
+                f'SELECT p.id FROM prediction p WHERE p.user_id = {user_table}.id '
+                f'ORDER BY p.created_at DESC, p.id DESC LIMIT 1)'
+            ))
+            changed = True
+        for index in Prediction.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    return changed
+
+
+def migrate_prediction_codes(batch_size=1000):
+    """
+    Rebuild a legacy prediction table (string columns) with coded columns.
+    Returns the number of rows copied, or None if nothing needed migrating.
+    """
+    inspector = db.inspect(db.engine)
+    if 'prediction' not in inspector.get_table_names():
+        return None
+    column_types = {col['name']: col['type'] for col in inspector.get_columns('prediction')}
+    if not isinstance(column_types['gender'], db.String):
+        return None
+
+    legacy = db.Table('prediction', db.MetaData(), autoload_with=db.engine)
+    coded_metadata = db.MetaData()
+    User.__table__.to_metadata(coded_metadata)
+    coded = Prediction.__table__.to_metadata(coded_metadata, name='prediction_coded')
+
+    copied = 0
+    with db.engine.begin() as conn:
+        coded.create(conn)
+        result = conn.execution_options(yield_per=batch_size).execute(
+            legacy.select().order_by(legacy.c.id)
+        )
+        for rows in result.partitions():
+            conn.execute(coded.insert(), [dict(row._mapping) for row in rows])
+            copied += len(rows)
+        legacy.drop(conn)
+        conn.execute(db.text('ALTER TABLE prediction_coded RENAME TO prediction'))
+        if conn.dialect.name == 'postgresql':
+            # Rows were copied with explicit ids, so move the sequence past them
+            conn.execute(db.text(
+                "SELECT setval(pg_get_serial_sequence('prediction', 'id'), "
+                "COALESCE(MAX(id), 1)) FROM prediction"
+            ))
+    return copied
@@ -0,0 +1,142 @@
+"""
+Compare the serving cost of model artifacts.
+
+Each artifact is profiled in a fresh process so load time and memory are not
+skewed by an earlier load. Reported per artifact: on-disk size, load time,
+resident memory added by the load, and predict_proba latency percentiles for
+single rows and for batches, on rows sampled from the patient data. Hold-out
+accuracy is shown when train.py's metrics JSON sits next to the artifact.
+
+    python profile_models.py model.joblib artifacts/model-*.joblib
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from dataset import DEFAULT_SOURCE, load_features_and_target
+
+PERCENTILES = (50, 95, 99)
+
+
+def _rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        pass
+    try:
+        # No procfs (e.g. macOS): fall back to peak RSS, reported in bytes there
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        # Windows: memory is not measured
+        return 0
+
+
+def _latencies(fn, inputs, warmup=5):
+    for x in inputs[:warmup]:
+        fn(x)
+    timings = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(np.array(timings) * 1000, PERCENTILES).tolist()
+
+
+def _accuracy_from_metrics(path):
+    metrics_path = os.path.splitext(path)[0] + '.metrics.json'
+    try:
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+        return metrics['candidates'][metrics['selected']]['test']['accuracy']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def profile_artifact(path, data_path, samples, batch_size, batches, seed):
+    """Profile one artifact; meant to run in its own process"""
+    import joblib
+    # Import the estimator modules up front so load time and RSS reflect the
+    # artifact itself rather than first-time sklearn imports
+    import sklearn.compose, sklearn.ensemble, sklearn.linear_model, sklearn.pipeline, sklearn.svm, sklearn.tree  # noqa: F401
+
+    X, _ = load_features_and_target(data_path)
+    X = X.astype(object)
+    rng = np.random.default_rng(seed)
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    model = joblib.load(path)
+    load_time = time.perf_counter() - start
+    rss_after = _rss_bytes()
+
+    single_rows = [X.iloc[[i]] for i in rng.integers(0, len(X), samples)]
+    batch_frames = [X.iloc[rng.integers(0, len(X), batch_size)] for _ in range(batches)]
+    return {
+        'artifact': path,
+        'size_bytes': os.path.getsize(path),
+        'load_ms': load_time * 1000,
+        'rss_delta_bytes': max(rss_after - rss_before, 0),
+        'single_ms': _latencies(model.predict_proba, single_rows),
+        'batch_ms': _latencies(model.predict_proba, batch_frames, warmup=1),
+        'batch_size': batch_size,
+        'accuracy': _accuracy_from_metrics(path),
+    }
+
+
+def format_table(results):
+    """Render profiling results as a fixed-width comparison table"""
+    pct = '/'.join(f'p{p}' for p in PERCENTILES)
+    headers = ['artifact', 'size MB', 'load ms', 'RSS MB', f'1-row ms {pct}', f'batch ms {pct}', 'accuracy']
+    rows = []
+    for r in results:
+        rows.append([
+            r['artifact'],
+            f"{r['size_bytes'] / 1e6:.2f}",
+            f"{r['load_ms']:.1f}",
+            f"{r['rss_delta_bytes'] / 1e6:.1f}",
+            '/'.join(f'{v:.2f}' for v in r['single_ms']),
+            '/'.join(f'{v:.1f}' for v in r['batch_ms']) + f" (n={r['batch_size']})",
+            f"{r['accuracy']:.3f}" if r['accuracy'] is not None else '-',
+        ])
+    widths = [max(len(str(row[i])) for row in [headers, *rows]) for i in range(len(headers))]
+    lines = ['  '.join(str(cell).ljust(width) for cell, width in zip(row, widths)) for row in [headers, *rows]]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('artifacts', nargs='+', help='Model artifacts (.joblib) to compare')
+    parser.add_argument('--data', default=DEFAULT_SOURCE, help='CSV to sample the workload from')
+    parser.add_argument('--samples', type=int, default=200, help='Single-row predictions to time')
+    parser.add_argument('--batch-size', type=int, default=256, help='Rows per batch prediction')
+    parser.add_argument('--batches', type=int, default=20, help='Batch predictions to time')
+    parser.add_argument('--seed', type=int, default=42, help='Sampling seed')
+    parser.add_argument('--json', dest='json_path', help='Also write raw results to this file')
+    args = parser.parse_args()
+
+    # spawn gives every artifact a clean interpreter for the load/RSS numbers
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for path in args.artifacts:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(
+                profile_artifact,
+                (path, args.data, args.samples, args.batch_size, args.batches, args.seed)
+            ))
+
+    print(format_table(results))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Train the hypertension stage classifier.
+
+Rebuilds the preprocessing pipeline from model.ipynb and runs a cross-validated
+grid search for each candidate estimator, spreading the folds and parameter
+combinations across all cores. The best model is written to
+artifacts/model-<version>.joblib together with a metrics JSON, and is copied to
+model.joblib (the file the web app serves) when --promote is given.
+
+    python train.py [--data data/patient_data.csv] [--n-jobs -1] [--promote]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset import (
+    CAT_FEATURES,
+    DEFAULT_SOURCE,
+    NUM_FEATURES,
+    STAGES,
+    VOCABULARIES,
+    file_digest,
+    load_features_and_target
+)
+
+ARTIFACT_DIR = 'artifacts'
+SERVED_MODEL = 'model.joblib'
+RANDOM_STATE = 42
+
+logger = logging.getLogger('train')
+
+
+def build_preprocessor():
+    """ColumnTransformer used in front of every candidate estimator"""
+    num_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        # Blood pressure ranges are ordered, lowest first
+        ('ordinal', OrdinalEncoder(categories=[list(VOCABULARIES[name]) for name in NUM_FEATURES]))
+    ])
+    cat_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('encoder', OneHotEncoder(sparse_output=False, handle_unknown='ignore'))
+    ])
+    return ColumnTransformer(transformers=[
+        ('num', num_transformer, NUM_FEATURES),
+        ('cat', cat_transformer, CAT_FEATURES)
+    ])
+
+
+def candidates():
+    """Candidate estimators and their hyperparameter grids"""
+    return {
+        'logistic_regression': (
+            LogisticRegression(max_iter=1000),
+            {'alg__C': [0.1, 1.0, 10.0]}
+        ),
+        'decision_tree': (
+            DecisionTreeClassifier(random_state=RANDOM_STATE),
+            {'alg__max_depth': [None, 5, 10], 'alg__min_samples_leaf': [1, 5]}
+        ),
+        'random_forest': (
+            RandomForestClassifier(random_state=RANDOM_STATE),
+            {'alg__n_estimators': [100, 300], 'alg__max_depth': [None, 10]}
+        ),
+        'svc': (
+            SVC(probability=True, random_state=RANDOM_STATE),
+            {'alg__C': [0.1, 1.0, 10.0], 'alg__kernel': ['rbf', 'linear']}
+        ),
+    }
+
+
+def evaluate(model, X_test, y_test):
+    """Hold-out metrics for a fitted model"""
+    y_pred = model.predict(X_test)
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision_macro': precision_score(y_test, y_pred, average='macro', zero_division=0),
+        'recall_macro': recall_score(y_test, y_pred, average='macro', zero_division=0),
+        'f1_macro': f1_score(y_test, y_pred, average='macro', zero_division=0),
+    }
+
+
+def search(name, estimator, grid, X_train, y_train, X_test, y_test, cv, n_jobs):
+    """Grid-search one candidate and return (best_model, metrics)"""
+    pipeline = Pipeline(steps=[('pre', build_preprocessor()), ('alg', estimator)])
+    grid_search = GridSearchCV(pipeline, grid, scoring='accuracy', cv=cv, n_jobs=n_jobs)
+    start = time.perf_counter()
+    grid_search.fit(X_train, y_train)
+    elapsed = time.perf_counter() - start
+
+    best = grid_search.best_index_
+    results = grid_search.cv_results_
+    metrics = {
+        'best_params': {k.replace('alg__', ''): v for k, v in grid_search.best_params_.items()},
+        'cv_accuracy_mean': float(results['mean_test_score'][best]),
+        'cv_accuracy_std': float(results['std_test_score'][best]),
+        'mean_fit_time': float(results['mean_fit_time'][best]),
+        'refit_time': float(grid_search.refit_time_),
+        'search_time': elapsed,
+        'test': evaluate(grid_search.best_estimator_, X_test, y_test),
+    }
+    logger.info(
+        "%s: cv accuracy %.3f +/- %.3f, test accuracy %.3f, f1 %.3f, search %.1fs, fit %.3fs, params %s",
+        name, metrics['cv_accuracy_mean'], metrics['cv_accuracy_std'],
+        metrics['test']['accuracy'], metrics['test']['f1_macro'],
+        elapsed, metrics['mean_fit_time'], metrics['best_params']
+    )
+    return grid_search.best_estimator_, metrics
+
+
+def train(data_path=DEFAULT_SOURCE, n_jobs=-1, folds=5, output_dir=ARTIFACT_DIR, promote=False):
+    """Run the full search and write the winning model; returns the metrics dict"""
+    X, y = load_features_and_target(data_path)
+    # Serve-time inputs are plain strings, so train on the same dtype
+    X = X.astype(object)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=RANDOM_STATE
+    )
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    logger.info("Training on %s rows, testing on %s rows, n_jobs=%s", len(X_train), len(X_test), n_jobs)
+
+    results = {}
+    fitted = {}
+    for name, (estimator, grid) in candidates().items():
+        fitted[name], results[name] = search(name, estimator, grid, X_train, y_train, X_test, y_test, cv, n_jobs)
+
+    best_name = max(results, key=lambda name: (results[name]['cv_accuracy_mean'], results[name]['test']['f1_macro']))
+    version = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    metrics = {
+        'version': version,
+        'selected': best_name,
+        'classes': list(STAGES),
+        'data': {'path': data_path, 'sha256': file_digest(data_path), 'rows': len(X)},
+        'cv_folds': folds,
+        'random_state': RANDOM_STATE,
+        'environment': {
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'numpy': np.__version__,
+        },
+        'candidates': results,
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, f'model-{version}.joblib')
+    metrics_path = os.path.join(output_dir, f'model-{version}.metrics.json')
+    joblib.dump(fitted[best_name], model_path)
+    with open(metrics_path, 'w') as f:
+        json.dump(metrics, f, indent=2)
+    logger.info("Selected %s; wrote %s and %s", best_name, model_path, metrics_path)
+
+    if promote:
+        shutil.copyfile(model_path, SERVED_MODEL)
+        logger.info("Promoted %s to %s", model_path, SERVED_MODEL)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', default=DEFAULT_SOURCE, help='Training CSV')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel jobs (-1 uses all cores)')
+    parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds')
+    parser.add_argument('--output-dir', default=ARTIFACT_DIR, help='Where versioned artifacts are written')
+    parser.add_argument('--promote', action='store_true', help=f'Also copy the selected model to {SERVED_MODEL}')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    train(args.data, args.n_jobs, args.folds, args.output_dir, args.promote)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,38 +7,11 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 from datetime import datetime
 
+from lookups import RISK_POINTS, recommendations_for, risk_level
+
 def get_recommendations(severity):
-    """Generate health recommendations based on severity level"""
-    recommendations = {
-        'Mild': [
-            "Monitor your blood pressure regularly at home",
-            "Maintain a healthy diet with reduced sodium intake",
-            "Exercise regularly for at least 30 minutes daily",
-            "Manage stress through meditation or yoga",
-            "Limit alcohol consumption",
-            "Maintain a healthy weight"
-        ],
-        'Moderate': [
-            "Check blood pressure daily and keep a log",
-            "Strictly follow a low-sodium diet (<2300mg per day)",
-            "Exercise 30-60 minutes daily (cardio and strength training)",
-            "Consult with a healthcare provider about medications",
-            "Reduce caffeine and alcohol intake significantly",
-            "Practice stress management techniques",
-            "Consider a weight management program"
-        ],
-        'Severe': [
-            "Seek immediate medical attention if experiencing chest pain or shortness of breath",
-            "Take prescribed medications as directed by your doctor",
-            "Monitor blood pressure multiple times daily",
-            "Follow a strict low-sodium diet strictly",
-            "Avoid physical exertion until cleared by doctor",
-            "Regular follow-up appointments with healthcare provider",
-            "Keep emergency contacts handy",
-            "Consider wearing a medical alert device"
-        ]
-    }
-    return recommendations.get(severity, [])
+    """Get health recommendations for a severity level"""
+    return recommendations_for(severity)
 
 def calculate_bmi(height_cm, weight_kg):
     """Calculate BMI from height and weight"""
@@ -57,17 +30,10 @@ def calculate_risk_score(severity, age, history, patient_diagnosed, take_medicat
     risk_score = 0
     
     # Severity contribution (20 points max)
-    severity_map = {'Mild': 5, 'Moderate': 15, 'Severe': 20}
-    risk_score += severity_map.get(severity, 0)
+    risk_score += RISK_POINTS['Severity'].get(severity, 0)
     
     # Age contribution (15 points max)
-    age_map = {
-        '18-34': 2,
-        '35-50': 8,
-        '51-64': 12,
-        '65+': 15
-    }
-    risk_score += age_map.get(age, 0)
+    risk_score += RISK_POINTS['Age'].get(age, 0)
     
     # History of hypertension (10 points)
     if history == 'Yes':
@@ -82,10 +48,8 @@ def calculate_risk_score(severity, age, history, patient_diagnosed, take_medicat
         risk_score += 10
     
     # Blood pressure levels (20 points)
-    systolic_map = {'100+': 2, '111 - 120': 5, '121 - 130': 12, '130+': 20}
-    diastolic_map = {'70 - 80': 2, '81 - 90': 5, '91 - 100': 12, '100+': 15, '130+': 20}
-    risk_score += systolic_map.get(systolic, 0)
-    risk_score += diastolic_map.get(diastolic, 0)
+    risk_score += RISK_POINTS['Systolic'].get(systolic, 0)
+    risk_score += RISK_POINTS['Diastolic'].get(diastolic, 0)
     
     # Symptoms (10 points each)
     if breath_shortness == 'Yes':
@@ -104,14 +68,7 @@ def calculate_risk_score(severity, age, history, patient_diagnosed, take_medicat
 
 def get_risk_level(risk_score):
     """Get risk level category"""
-    if risk_score < 20:
-        return "Low"
-    elif risk_score < 40:
-        return "Moderate"
-    elif risk_score < 60:
-        return "High"
-    else:
-        return "Very High"
+    return risk_level(risk_score)
 
 def get_confidence_score(prediction_proba=None):
     """
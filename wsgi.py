@@ -4,20 +4,25 @@ WSGI entry point for production deployment (Render, Heroku, etc.)
 import os
 import logging
 from app import app, db
+from models import migrate_clinician_columns, migrate_prediction_codes
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by app.init_logging
 logger = logging.getLogger(__name__)
 
 # Create all database tables on startup
 try:
-    logger.info(f"Database URI: {app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')[:50]}...")
+    logger.info("Database URI: %s...", app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')[:50])
     with app.app_context():
         logger.info("Creating database tables...")
         db.create_all()
         logger.info("Database tables created successfully!")
+        copied = migrate_prediction_codes()
+        if copied is not None:
+            logger.info("Re-encoded %s legacy predictions to coded columns", copied)
+        if migrate_clinician_columns():
+            logger.info("Added clinician columns to the user table")
 except Exception as e:
-    logger.error(f"Error creating database tables: {e}", exc_info=True)
+    logger.error("Error creating database tables: %s", e, exc_info=True)
     raise
 
 if __name__ == "__main__":